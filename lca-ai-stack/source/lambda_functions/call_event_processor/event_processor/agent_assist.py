@@ -0,0 +1,46 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: Apache-2.0
+""" Agent Assist Context shared by the API Mutation Processors
+"""
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Any, Dict, Optional
+
+if TYPE_CHECKING:
+    from mypy_boto3_lexv2_runtime.client import LexRuntimeV2Client
+    from types_aiobotocore_lambda.client import LambdaClient
+else:
+    LexRuntimeV2Client = object
+    LambdaClient = object
+
+
+@dataclass(frozen=True)
+class AgentAssistCtx:
+    """Agent assist clients and bot settings passed to the agent assist requests"""
+    lex_client: Optional[LexRuntimeV2Client] = None
+    lex_bot_id: str = ""
+    lex_bot_alias_id: str = ""
+    lex_bot_locale_id: str = ""
+    lambda_client: Optional[LambdaClient] = None
+    lambda_agent_assist_function_arn: str = ""
+
+    @classmethod
+    def from_agent_assist_args(cls, agent_assist_args: Dict[str, Any]) -> "AgentAssistCtx":
+        """Creates the context from the agent assist args of the batch processor"""
+        return cls(
+            lex_client=agent_assist_args.get("lex_client"),
+            lex_bot_id=agent_assist_args.get("lex_bot_id", ""),
+            lex_bot_alias_id=agent_assist_args.get("lex_bot_alias_id", ""),
+            lex_bot_locale_id=agent_assist_args.get("lex_bot_locale_id", ""),
+            lambda_client=agent_assist_args.get("lambda_client"),
+            lambda_agent_assist_function_arn=agent_assist_args.get(
+                "lambda_agent_assist_function_arn", ""
+            ),
+        )
+
+    @property
+    def is_lex_agent_assist_enabled(self) -> bool:
+        return self.lex_client is not None
+
+    @property
+    def is_lambda_agent_assist_enabled(self) -> bool:
+        return self.lambda_client is not None
@@ -3,18 +3,20 @@
 """ Contact Lens API Mutation Processor
 """
 import asyncio
-from datetime import datetime, timedelta
+from datetime import datetime, timezone
+import logging
+import os
 from os import getenv
-from typing import TYPE_CHECKING, Any, Coroutine, Dict, List, Literal, Optional
-import uuid
+import time
+from typing import TYPE_CHECKING, Any, Coroutine, Dict, List, Literal
 import boto3
-import json
 
 # third-party imports from Lambda layer
 from aws_lambda_powertools import Logger
 from gql.client import AsyncClientSession as AppsyncAsyncClientSession
 from gql.dsl import DSLMutation, DSLSchema, dsl_gql
 from graphql.language.printer import print_ast
+import orjson
 
 # imports from Lambda layer
 # pylint: disable=import-error
@@ -30,27 +32,15 @@ from lambda_utils import invoke_lambda
 
 # pylint: enable=import-error
 
+from .agent_assist import AgentAssistCtx
+
 if TYPE_CHECKING:
     from mypy_boto3_lexv2_runtime.type_defs import RecognizeTextResponseTypeDef
-    from mypy_boto3_lexv2_runtime.client import LexRuntimeV2Client
-    from mypy_boto3_lambda.type_defs import InvocationResponseTypeDef
-    from mypy_boto3_lambda.client import LambdaClient
+    from types_aiobotocore_lambda.type_defs import InvocationResponseTypeDef
 else:
-    LexRuntimeV2Client = object
     RecognizeTextResponseTypeDef = object
-    LambdaClient = object
     InvocationResponseTypeDef = object
 
-IS_LEX_AGENT_ASSIST_ENABLED = False
-LEXV2_CLIENT: Optional[LexRuntimeV2Client] = None
-LEX_BOT_ID: str
-LEX_BOT_ALIAS_ID: str
-LEX_BOT_LOCALE_ID: str
-
-IS_LAMBDA_AGENT_ASSIST_ENABLED = False
-LAMBDA_CLIENT: Optional[LexRuntimeV2Client] = None
-LAMBDA_AGENT_ASSIST_FUNCTION_ARN: str
-
 # Contact Lens doesn't include call metadata so we attempt to use API lookups 
 # to retrieve numbers from defined contact attributes on receipt of STARTED event.
 # Connect contact flow must set these (user defined) attributes using values of 
@@ -59,11 +49,21 @@ DEFAULT_CUSTOMER_PHONE_NUMBER = getenv("DEFAULT_CUSTOMER_PHONE_NUMBER", "+180055
 DEFAULT_SYSTEM_PHONE_NUMBER = getenv("DEFAULT_SYSTEM_PHONE_NUMBER", "+18005551111")
 CONNECT_CONTACT_ATTR_CUSTOMER_PHONE_NUMBER = getenv("CONNECT_CONTACT_ATTR_CUSTOMER_PHONE_NUMBER", "LCA Caller Phone Number")
 CONNECT_CONTACT_ATTR_SYSTEM_PHONE_NUMBER = getenv("CONNECT_CONTACT_ATTR_SYSTEM_PHONE_NUMBER", "LCA System Phone Number")
+# created on first use and reused by warm invocations
+CONNECT_CLIENT = None
 
 # Get value for DynamboDB TTL field
 DYNAMODB_EXPIRATION_IN_DAYS = getenv("DYNAMODB_EXPIRATION_IN_DAYS", "90")
+_TTL_DELTA_SECONDS = int(DYNAMODB_EXPIRATION_IN_DAYS) * 86400
 def get_ttl():
-    return int((datetime.utcnow() + timedelta(days=int(DYNAMODB_EXPIRATION_IN_DAYS))).timestamp())
+    return int(time.time()) + _TTL_DELTA_SECONDS
+
+def _now_iso() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+def _new_segment_id() -> str:
+    # segment ids are opaque so random hex is used instead of formatting a UUID
+    return os.urandom(16).hex()
 
 LOGGER = Logger(location="%(filename)s:%(lineno)d - %(funcName)s()")
 
@@ -87,8 +87,15 @@ SENTIMENT_WEIGHT = dict(POSITIVE=5, NEGATIVE=-5, NEUTRAL=0, MIXED=0)
 ##########################################################################
 # Call Status
 ##########################################################################
+def get_connect_client():
+    # pylint: disable=global-statement
+    global CONNECT_CLIENT
+    if CONNECT_CLIENT is None:
+        CONNECT_CLIENT = boto3.client('connect')
+    return CONNECT_CLIENT
+
 def get_caller_and_system_phone_numbers_from_connect(instanceId, contactId):
-    client = boto3.client('connect')
+    client = get_connect_client()
     response = client.get_contact_attributes(
         InstanceId=instanceId,
         InitialContactId=contactId
@@ -122,7 +129,7 @@ def transform_message_to_call_status(message: Dict) -> Dict[str, object]:
             SystemPhoneNumber=system_phone_number,
         )
 
-    updated_at = datetime.utcnow().astimezone().isoformat()
+    updated_at = _now_iso()
 
     return dict(
         CallId=call_id,
@@ -171,8 +178,9 @@ async def update_call_status(
             client_session=appsync_session,
             logger=LOGGER,
         )
-        query_string = print_ast(query)
-        LOGGER.debug("appsync mutation response", extra=dict(query=query_string, response=response))
+        if LOGGER.isEnabledFor(logging.DEBUG):
+            query_string = print_ast(query)
+            LOGGER.debug("appsync mutation response", extra=dict(query=query_string, response=response))
         return_value["successes"].append(response)
     except Exception as error:  # pylint: disable=broad-except
         return_value["errors"].append(error)
@@ -207,8 +215,9 @@ async def execute_update_agent_mutation(
                         logger=LOGGER,
                     )
 
-    query_string = print_ast(query)
-    LOGGER.debug("appsync mutation response", extra=dict(query=query_string, response=response))
+    if LOGGER.isEnabledFor(logging.DEBUG):
+        query_string = print_ast(query)
+        LOGGER.debug("appsync mutation response", extra=dict(query=query_string, response=response))
 
     return response
 
@@ -255,7 +264,7 @@ def transform_segment_to_add_transcript(segment: Dict) -> Dict[str, object]:
     # contact lens uses "CUSTOMER" and LCA expects "CALLER"
     if channel == "CUSTOMER":
         channel = "CALLER"
-    created_at = datetime.utcnow().astimezone().isoformat()
+    created_at = _now_iso()
     # Contact Lens times are in Milliseconds
     # Changing to seconds to normalize units used by the transcript state manager which uses
     # seconds per the Transcribe streaming API
@@ -327,9 +336,9 @@ def transform_segment_to_categories_agent_assist(
     call_id: str,
 ) -> Dict[str, Any]:
     """Transforms Contact Lens Categories segment payload to Agent Assist"""
-    created_at = datetime.utcnow().astimezone().isoformat()
+    created_at = _now_iso()
     is_partial = False
-    segment_id = str(uuid.uuid4())
+    segment_id = _new_segment_id()
     channel = "AGENT_ASSISTANT"
 
     transcript = f"{category}"
@@ -372,9 +381,9 @@ def transform_segment_to_issues_agent_assist(
     """Transforms Contact Lens Transcript Issues payload to Agent Assist"""
     # pylint: disable=too-many-locals
     call_id: str = segment["CallId"]
-    created_at = datetime.utcnow().astimezone().isoformat()
+    created_at = _now_iso()
     is_partial = False
-    segment_id = str(uuid.uuid4())
+    segment_id = _new_segment_id()
     channel = "AGENT_ASSISTANT"
     segment_item = segment["Transcript"]
     transcript = segment_item["Content"]
@@ -494,7 +503,7 @@ def get_lex_agent_assist_message(bot_response):
     # Use markdown if present in appContext.altMessages.markdown session attr (Lex Web UI / QnABot)
     appContextJSON = bot_response.get("sessionState",{}).get("sessionAttributes",{}).get("appContext")
     if appContextJSON:
-        appContext = json.loads(appContextJSON)
+        appContext = orjson.loads(appContextJSON)
         markdown = appContext.get("altMessages",{}).get("markdown")
         if markdown:
             message = markdown
@@ -507,6 +516,7 @@ async def send_lex_agent_assist(
     transcript_segment_args: Dict[str, Any],
     content: str,
     appsync_session: AppsyncAsyncClientSession,
+    agent_assist_ctx: AgentAssistCtx,
 ):
     """Sends Lex Agent Assist Requests"""
     if not appsync_session.client.schema:
@@ -520,10 +530,10 @@ async def send_lex_agent_assist(
     bot_response: RecognizeTextResponseTypeDef = await recognize_text_lex(
         text=content,
         session_id=call_id,
-        lex_client=LEXV2_CLIENT,
-        bot_id=LEX_BOT_ID,
-        bot_alias_id=LEX_BOT_ALIAS_ID,
-        locale_id=LEX_BOT_LOCALE_ID,
+        lex_client=agent_assist_ctx.lex_client,
+        bot_id=agent_assist_ctx.lex_bot_id,
+        bot_alias_id=agent_assist_ctx.lex_bot_alias_id,
+        locale_id=agent_assist_ctx.lex_bot_locale_id,
     )
     
     LOGGER.debug("Bot Response: ", extra=bot_response)
@@ -553,6 +563,7 @@ async def send_lex_agent_assist(
 def add_lex_agent_assistances(
     message: Dict[str, Any],
     appsync_session: AppsyncAsyncClientSession,
+    agent_assist_ctx: AgentAssistCtx,
 ) -> List[Coroutine]:
     """Add Lex Agent Assist GraphQL Mutations"""
     # pylint: disable=too-many-locals
@@ -580,9 +591,9 @@ def add_lex_agent_assistances(
             is_partial = False
             segment_item = segment["Utterance"]
             content = segment_item["PartialContent"]
-            segment_id = str(uuid.uuid4())
+            segment_id = _new_segment_id()
 
-            created_at = datetime.utcnow().astimezone().isoformat()
+            created_at = _now_iso()
             start_time = segment_item["BeginOffsetMillis"] / 1000
             end_time = segment_item["EndOffsetMillis"] / 1000
             end_time = end_time + 0.001 # UI sort order
@@ -614,9 +625,9 @@ def add_lex_agent_assistances(
             is_partial = False
             segment_item = segment["Transcript"]
             content = segment_item["Content"]
-            segment_id = str(uuid.uuid4())
+            segment_id = _new_segment_id()
 
-            created_at = datetime.utcnow().astimezone().isoformat()
+            created_at = _now_iso()
             start_time = segment_item["BeginOffsetMillis"] / 1000
             end_time = segment_item["EndOffsetMillis"] / 1000
             end_time = end_time + 0.001 # UI sort order
@@ -666,6 +677,7 @@ def add_lex_agent_assistances(
     for agent_assist_args in send_lex_agent_assist_args:
         task = send_lex_agent_assist(
             appsync_session=appsync_session,
+            agent_assist_ctx=agent_assist_ctx,
             **agent_assist_args,
         )
         tasks.append(task)
@@ -676,23 +688,37 @@ def add_lex_agent_assistances(
 # Lambda Agent Assist
 ##########################################################################
 
-def get_lambda_agent_assist_message(lambda_response):
+async def get_lambda_agent_assist_message(lambda_response):
     message = ""
     try:
-        payload = json.loads(lambda_response.get("Payload").read().decode("utf-8"))
-        # Lambda result payload should include field 'message'
-        message = payload["message"]
-    except Exception as error:
+        # orjson parses the payload bytes without decoding them first
+        payload = orjson.loads(await lambda_response["Payload"].read())
+    except Exception as error:  # pylint: disable=broad-except
+        LOGGER.error("Agent assist Lambda result payload parsing exception: %s", error)
+        return message
+
+    if lambda_response.get("FunctionError"):
         LOGGER.error(
-            "Agent assist Lambda result payload parsing exception. Lambda must return object with key 'message'",
-            extra=error,
+            "Agent assist Lambda function error",
+            extra=dict(function_error=lambda_response["FunctionError"], payload=payload),
         )
+        return message
+
+    # Lambda result payload should include field 'message'
+    if not isinstance(payload, dict) or "message" not in payload:
+        LOGGER.error(
+            "Agent assist Lambda result payload error. Lambda must return object with key 'message'",
+        )
+        return message
+
+    message = payload.get("message") or ""
     return message
 
 async def send_lambda_agent_assist(
     transcript_segment_args: Dict[str, Any],
     content: str,
     appsync_session: AppsyncAsyncClientSession,
+    agent_assist_ctx: AgentAssistCtx,
 ):
     """Sends Lambda Agent Assist Requests"""
     if not appsync_session.client.schema:
@@ -711,14 +737,14 @@ async def send_lambda_agent_assist(
 
     lambda_response: InvocationResponseTypeDef = await invoke_lambda(
         payload=payload,
-        lambda_client=LAMBDA_CLIENT,
-        lambda_agent_assist_function_arn=LAMBDA_AGENT_ASSIST_FUNCTION_ARN,
+        lambda_client=agent_assist_ctx.lambda_client,
+        lambda_agent_assist_function_arn=agent_assist_ctx.lambda_agent_assist_function_arn,
     )
     
     LOGGER.debug("Agent Assist Lambda Response: ", extra=lambda_response)
 
     result = {}
-    transcript = get_lambda_agent_assist_message(lambda_response)
+    transcript = await get_lambda_agent_assist_message(lambda_response)
     if transcript:
         transcript_segment = {**transcript_segment_args, "Transcript": transcript}
 
@@ -742,6 +768,7 @@ async def send_lambda_agent_assist(
 def add_lambda_agent_assistances(
     message: Dict[str, Any],
     appsync_session: AppsyncAsyncClientSession,
+    agent_assist_ctx: AgentAssistCtx,
 ) -> List[Coroutine]:
     """Add Lambda Agent Assist GraphQL Mutations"""
     # pylint: disable=too-many-locals
@@ -769,9 +796,9 @@ def add_lambda_agent_assistances(
             is_partial = False
             segment_item = segment["Utterance"]
             content = segment_item["PartialContent"]
-            segment_id = str(uuid.uuid4())
+            segment_id = _new_segment_id()
 
-            created_at = datetime.utcnow().astimezone().isoformat()
+            created_at = _now_iso()
             start_time = segment_item["BeginOffsetMillis"] / 1000
             end_time = segment_item["EndOffsetMillis"] / 1000
             end_time = end_time + 0.001 # UI sort order
@@ -803,9 +830,9 @@ def add_lambda_agent_assistances(
             is_partial = False
             segment_item = segment["Transcript"]
             content = segment_item["Content"]
-            segment_id = str(uuid.uuid4())
+            segment_id = _new_segment_id()
 
-            created_at = datetime.utcnow().astimezone().isoformat()
+            created_at = _now_iso()
             start_time = segment_item["BeginOffsetMillis"] / 1000
             end_time = segment_item["EndOffsetMillis"] / 1000 
             end_time = end_time + 0.001 # UI sort order
@@ -854,6 +881,7 @@ def add_lambda_agent_assistances(
     for agent_assist_args in send_lambda_agent_assist_args:
         task = send_lambda_agent_assist(
             appsync_session=appsync_session,
+            agent_assist_ctx=agent_assist_ctx,
             **agent_assist_args,
         )
         tasks.append(task)
@@ -867,24 +895,7 @@ async def execute_process_event_api_mutation(
     agent_assist_args: Dict[str, Any],
 ) -> Dict[Literal["successes", "errors"], List]:
     """Executes AppSync API Mutation"""
-    # pylint: disable=global-statement
-    global LEXV2_CLIENT
-    global IS_LEX_AGENT_ASSIST_ENABLED
-    global LEX_BOT_ID
-    global LEX_BOT_ALIAS_ID
-    global LEX_BOT_LOCALE_ID
-    global LAMBDA_CLIENT
-    global LAMBDA_AGENT_ASSIST_FUNCTION_ARN
-    # pylint: enable=global-statement
-
-    LEXV2_CLIENT = agent_assist_args.get("lex_client")
-    IS_LEX_AGENT_ASSIST_ENABLED = LEXV2_CLIENT is not None
-    LEX_BOT_ID = agent_assist_args.get("lex_bot_id", "")
-    LEX_BOT_ALIAS_ID = agent_assist_args.get("lex_bot_alias_id", "")
-    LEX_BOT_LOCALE_ID = agent_assist_args.get("lex_bot_locale_id", "")
-    LAMBDA_CLIENT = agent_assist_args.get("lambda_client")
-    IS_LAMBDA_AGENT_ASSIST_ENABLED = LAMBDA_CLIENT is not None
-    LAMBDA_AGENT_ASSIST_FUNCTION_ARN = agent_assist_args.get("lambda_agent_assist_function_arn", "") 
+    agent_assist_ctx = AgentAssistCtx.from_agent_assist_args(agent_assist_args)
 
     return_value: Dict[Literal["successes", "errors"], List] = {
         "successes": [],
@@ -911,20 +922,22 @@ async def execute_process_event_api_mutation(
         )
 
         add_lex_agent_assists_tasks = []
-        if IS_LEX_AGENT_ASSIST_ENABLED:
+        if agent_assist_ctx.is_lex_agent_assist_enabled:
             add_lex_agent_assists_tasks.extend(
                 add_lex_agent_assistances(
                     message=message_normalized,
                     appsync_session=appsync_session,
+                    agent_assist_ctx=agent_assist_ctx,
                 )
             )
 
         add_lambda_agent_assists_tasks = []
-        if IS_LAMBDA_AGENT_ASSIST_ENABLED:
+        if agent_assist_ctx.is_lambda_agent_assist_enabled:
             add_lambda_agent_assists_tasks.extend(
                 add_lambda_agent_assistances(
                     message=message_normalized,
                     appsync_session=appsync_session,
+                    agent_assist_ctx=agent_assist_ctx,
                 )
             )
 
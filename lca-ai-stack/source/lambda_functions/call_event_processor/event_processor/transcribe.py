@@ -3,19 +3,33 @@
 """ Transcribe API Mutation Processor
 """
 import asyncio
-from datetime import datetime, timedelta
+from datetime import datetime, timezone
+from functools import lru_cache
+import logging
+import os
 from os import getenv
-from typing import TYPE_CHECKING, Any, Coroutine, Dict, List, Literal, Optional
-import uuid
-import json
+import time
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Awaitable,
+    Callable,
+    Dict,
+    FrozenSet,
+    List,
+    Literal,
+    NamedTuple,
+    Optional,
+    Tuple,
+)
 
 # third-party imports from Lambda layer
-import boto3
-from botocore.config import Config as BotoCoreConfig
 from aws_lambda_powertools import Logger
 from gql.client import AsyncClientSession as AppsyncAsyncClientSession
-from gql.dsl import DSLMutation, DSLSchema, dsl_gql
+from gql.dsl import DSLField, DSLMutation, DSLSchema, DSLVariableDefinitions, dsl_gql
+from graphql import DocumentNode, GraphQLSchema, get_named_type
 from graphql.language.printer import print_ast
+import orjson
 
 
 # custom utils/helpers imports from Lambda layer
@@ -28,18 +42,23 @@ from graphql_helpers import (
 )
 from lex_utils import recognize_text_lex
 from lambda_utils import invoke_lambda
-from sentiment import ComprehendWeightedSentiment
+from sentiment import (
+    ComprehendWeightedSentiment,
+    SentimentBatcher,
+    SentimentCache,
+)
 # pylint: enable=import-error
 
+from .agent_assist import AgentAssistCtx
+
 if TYPE_CHECKING:
     from mypy_boto3_lexv2_runtime.type_defs import RecognizeTextResponseTypeDef
     from mypy_boto3_lexv2_runtime.client import LexRuntimeV2Client
-    from mypy_boto3_lambda.type_defs import InvocationResponseTypeDef
-    from mypy_boto3_lambda.client import LambdaClient
-    from mypy_boto3_comprehend.client import ComprehendClient
+    from types_aiobotocore_lambda.type_defs import InvocationResponseTypeDef
+    from types_aiobotocore_lambda.client import LambdaClient
+    from types_aiobotocore_comprehend.client import ComprehendClient
     from mypy_boto3_comprehend.type_defs import DetectSentimentResponseTypeDef
     from mypy_boto3_comprehend.literals import LanguageCodeType
-    from boto3 import Session as Boto3Session
 else:
     LexRuntimeV2Client = object
     RecognizeTextResponseTypeDef = object
@@ -48,30 +67,47 @@ else:
     ComprehendClient = object
     DetectSentimentResponseTypeDef = object
     LanguageCodeType = object
-    Boto3Session = object
 
-BOTO3_SESSION: Boto3Session = boto3.Session()
-CLIENT_CONFIG = BotoCoreConfig(
-    retries={"mode": "adaptive", "max_attempts": 3},
-)
 IS_SENTIMENT_ANALYSIS_ENABLED = getenv("IS_SENTIMENT_ANALYSIS_ENABLED", "true").lower() == "true"
-if IS_SENTIMENT_ANALYSIS_ENABLED:
-    COMPREHEND_CLIENT: ComprehendClient = BOTO3_SESSION.client("comprehend", config=CLIENT_CONFIG)
-    COMPREHEND_LANGUAGE_CODE = getenv("COMPREHEND_LANGUAGE_CODE", "en")
-
-IS_LEX_AGENT_ASSIST_ENABLED = False
-LEXV2_CLIENT: Optional[LexRuntimeV2Client] = None
-LEX_BOT_ID: str
-LEX_BOT_ALIAS_ID: str
-LEX_BOT_LOCALE_ID: str
-
-IS_LAMBDA_AGENT_ASSIST_ENABLED = False
-LAMBDA_CLIENT: Optional[LexRuntimeV2Client] = None
-LAMBDA_AGENT_ASSIST_FUNCTION_ARN: str
+COMPREHEND_LANGUAGE_CODE = getenv("COMPREHEND_LANGUAGE_CODE", "en")
+# coalesces the sentiment requests of concurrent segments into BatchDetectSentiment calls
+# created on first use by init_sentiment_batcher() with the client of the Lambda function
+SENTIMENT_BATCHER: Optional[SentimentBatcher] = None
+COMPREHEND_MAX_CONCURRENCY = int(
+    getenv("COMPREHEND_MAX_CONCURRENCY", str(SentimentBatcher.DEFAULT_MAX_CONCURRENT_BATCHES))
+)
+# memoizes sentiment results of repeated transcript texts
+IS_SENTIMENT_CACHE_ENABLED = getenv("IS_SENTIMENT_CACHE_ENABLED", "true").lower() == "true"
+SENTIMENT_CACHE: Optional[SentimentCache] = (
+    SentimentCache(
+        max_size=int(getenv("SENTIMENT_CACHE_MAX_SIZE", str(SentimentCache.DEFAULT_MAX_SIZE))),
+        ttl_in_secs=int(
+            getenv("SENTIMENT_CACHE_TTL_IN_SECS", str(SentimentCache.DEFAULT_TTL_IN_SECS))
+        ),
+        # optionally persisted in the execution environment (e.g. /tmp/sentiment_cache.json)
+        persist_path=getenv("SENTIMENT_CACHE_PERSIST_PATH", "") or None,
+        persist_interval_in_secs=float(
+            getenv(
+                "SENTIMENT_CACHE_PERSIST_INTERVAL_IN_SECS",
+                str(SentimentCache.DEFAULT_PERSIST_INTERVAL_IN_SECS),
+            )
+        ),
+        # optionally ignores case and punctuation - disabled by default
+        normalize_text=getenv("SENTIMENT_CACHE_NORMALIZE_TEXT", "false").lower() == "true",
+    )
+    if IS_SENTIMENT_CACHE_ENABLED
+    else None
+)
 
 LOGGER = Logger(location="%(filename)s:%(lineno)d - %(funcName)s()")
 EVENT_LOOP = asyncio.get_event_loop()
 
+# bound the concurrent requests sent to each downstream service by the segments
+# of a batch to avoid being throttled. Comprehend is bounded by the batcher
+LEX_SEMAPHORE = asyncio.Semaphore(int(getenv("LEX_MAX_CONCURRENCY", "10")))
+LAMBDA_SEMAPHORE = asyncio.Semaphore(int(getenv("LAMBDA_MAX_CONCURRENCY", "20")))
+APPSYNC_SEMAPHORE = asyncio.Semaphore(int(getenv("APPSYNC_MAX_CONCURRENCY", "50")))
+
 CALL_EVENT_TYPE_TO_STATUS = {
     "START": "STARTED",
     "START_TRANSCRIPT": "TRANSCRIBING",
@@ -91,8 +127,123 @@ DEFAULT_CUSTOMER_PHONE_NUMBER = getenv("DEFAULT_CUSTOMER_PHONE_NUMBER", "+180055
 
 # Get value for DynamboDB TTL field
 DYNAMODB_EXPIRATION_IN_DAYS = getenv("DYNAMODB_EXPIRATION_IN_DAYS", "90")
+_TTL_DELTA_SECONDS = int(DYNAMODB_EXPIRATION_IN_DAYS) * 86400
 def get_ttl():
-    return int((datetime.utcnow() + timedelta(days=int(DYNAMODB_EXPIRATION_IN_DAYS))).timestamp())
+    return int(time.time()) + _TTL_DELTA_SECONDS
+
+def _now_iso() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+def _new_segment_id() -> str:
+    # segment ids are opaque so random hex is used instead of formatting a UUID
+    return os.urandom(16).hex()
+
+def init_sentiment_batcher(comprehend_client: ComprehendClient) -> SentimentBatcher:
+    """Creates the sentiment batcher of the async Comprehend client if it hasn't been created yet"""
+    # pylint: disable=global-statement
+    global SENTIMENT_BATCHER
+    if SENTIMENT_BATCHER is None:
+        SENTIMENT_BATCHER = SentimentBatcher(
+            comprehend_client=comprehend_client,
+            language_code=COMPREHEND_LANGUAGE_CODE,
+            max_concurrent_batches=COMPREHEND_MAX_CONCURRENCY,
+        )
+    return SENTIMENT_BATCHER
+
+@lru_cache(maxsize=4)
+def _get_dsl_schema(schema: GraphQLSchema) -> DSLSchema:
+    """Gets the DSL Schema of a GraphQL Schema
+
+    The client fetches the schema once and reuses it across sessions so the DSL
+    Schema built from it is memoized instead of being rebuilt on every mutation
+    """
+    return DSLSchema(schema)
+
+class MutationDocument(NamedTuple):
+    """Pre-compiled GraphQL mutation document that takes its input as a variable"""
+    document: DocumentNode
+    input_field_names: FrozenSet[str]
+
+@lru_cache(maxsize=16)
+def _get_mutation_document(
+    schema: GraphQLSchema,
+    mutation_name: str,
+    fields_fns: Tuple[Callable[[DSLSchema], Tuple[DSLField, ...]], ...],
+) -> MutationDocument:
+    dsl_schema = _get_dsl_schema(schema)
+    variables = DSLVariableDefinitions()
+    mutation = DSLMutation(
+        getattr(dsl_schema.Mutation, mutation_name).args(input=variables.input).select(
+            *(field for fields_fn in fields_fns for field in fields_fn(dsl_schema)),
+        )
+    )
+    mutation.variable_definitions = variables
+
+    if schema.mutation_type is None:
+        raise ValueError("invalid AppSync schema")
+    input_type = get_named_type(schema.mutation_type.fields[mutation_name].args["input"].type)
+
+    return MutationDocument(
+        document=dsl_gql(mutation),
+        input_field_names=frozenset(input_type.fields),
+    )
+
+def _validate_session(appsync_session: AppsyncAsyncClientSession) -> None:
+    if not appsync_session.client.schema:
+        raise ValueError("invalid AppSync schema")
+
+def get_mutation_document(
+    appsync_session: AppsyncAsyncClientSession,
+    mutation_name: str,
+    *fields_fns: Callable[[DSLSchema], Tuple[DSLField, ...]],
+) -> MutationDocument:
+    """Gets the pre-compiled document of a mutation with an $input variable
+
+    The document is built once per schema and reused so that the mutation AST
+    isn't rebuilt on every call. The selected fields are the concatenation of
+    the fields returned by the field selector functions. The session schema is
+    expected to have been validated by _validate_session()
+    """
+    return _get_mutation_document(
+        appsync_session.client.schema,  # type: ignore
+        mutation_name,
+        fields_fns,
+    )
+
+def create_call_output_fields(schema: DSLSchema) -> Tuple[DSLField, ...]:
+    """Create Call Output type field selector"""
+    return (schema.CreateCallOutput.CallId,)
+
+async def execute_mutation(
+    mutation_document: MutationDocument,
+    mutation_input: Dict[str, Any],
+    appsync_session: AppsyncAsyncClientSession,
+    **kwargs,
+) -> Dict:
+    """Executes a pre-compiled mutation binding the input to its $input variable
+
+    Keys that are not fields of the mutation input type are dropped since the
+    API rejects unknown input fields
+    """
+    variable_values = {
+        "input": {
+            k: v for k, v in mutation_input.items() if k in mutation_document.input_field_names
+        },
+    }
+    async with APPSYNC_SEMAPHORE:
+        return await execute_gql_query_with_retries(
+            mutation_document.document,
+            client_session=appsync_session,
+            variable_values=variable_values,
+            logger=LOGGER,
+            **kwargs,
+        )
+
+def log_query_result(mutation_document: MutationDocument, result: Dict) -> None:
+    """Logs the query result including the query string when debug is enabled"""
+    if LOGGER.isEnabledFor(logging.DEBUG):
+        query_string = print_ast(mutation_document.document)
+        LOGGER.debug("query result", extra=dict(query=query_string, result=result))
 
 ##########################################################################
 # Transcripts
@@ -109,7 +260,7 @@ def transform_segment_to_add_transcript(message: Dict) -> Dict[str, object]:
     end_time: float = message["EndTime"]
     transcript: str = message["Transcript"]
     is_partial: bool = message["IsPartial"]
-    created_at = datetime.utcnow().astimezone().isoformat()
+    created_at = _now_iso()
 
 
     return dict(
@@ -128,71 +279,66 @@ def transform_segment_to_add_transcript(message: Dict) -> Dict[str, object]:
     )
 
 def add_transcript_segments(
-    message: Dict[str, Any],
+    transcript_segment: Dict[str, object],
     appsync_session: AppsyncAsyncClientSession,
-) -> List[Coroutine]:
+) -> List[asyncio.Task]:
     """Add Transcript Segment GraphQL Mutation"""
-    if not appsync_session.client.schema:
-        raise ValueError("invalid AppSync schema")
-    schema = DSLSchema(appsync_session.client.schema)
+    mutation_document = get_mutation_document(
+        appsync_session,
+        "addTranscriptSegment",
+        transcript_segment_fields,
+    )
 
     tasks = []
-        
-    transcript_segment = {
-        **transform_segment_to_add_transcript({**message}),
-    }
 
     if transcript_segment:
-        query = dsl_gql(
-            DSLMutation(
-                schema.Mutation.addTranscriptSegment.args(input=transcript_segment).select(
-                    *transcript_segment_fields(schema),
-                )
-            )
-        )
         ignore_exception_fn = lambda e: True if (e["message"] == 'item put condition failure') else False
         tasks.append(
-            execute_gql_query_with_retries(
-                query,
-                client_session=appsync_session,
-                logger=LOGGER,
-                should_ignore_exception_fn = ignore_exception_fn, 
+            asyncio.create_task(
+                execute_mutation(
+                    mutation_document,
+                    transcript_segment,
+                    appsync_session=appsync_session,
+                    should_ignore_exception_fn = ignore_exception_fn, 
+                ),
             ),
         )
 
     return tasks
 
+async def batch_detect_sentiment(text: str) -> DetectSentimentResponseTypeDef:
+    """Detects sentiment batched with the other segments in the Lambda batch"""
+    if SENTIMENT_BATCHER is None:
+        raise ValueError("sentiment batcher is not initialized")
+    return await SENTIMENT_BATCHER.detect_sentiment(text)
+
 async def detect_sentiment(text: str) -> DetectSentimentResponseTypeDef:
-    # text_hash = hash(text)
-    # if text_hash in self._sentiment_cache:
-    #     LOGGER.debug("using sentiment cache on text: [%s]", text)
-    #     return self._sentiment_cache[text_hash]
+    if SENTIMENT_CACHE is None:
+        return await batch_detect_sentiment(text)
 
-    LOGGER.debug("detect sentiment on text: [%s]", text)
-    loop = asyncio.get_running_loop()
-    sentiment_future = loop.run_in_executor(
-        None,
-        lambda: COMPREHEND_CLIENT.detect_sentiment(
-            Text=text,
-            LanguageCode=COMPREHEND_LANGUAGE_CODE,
-        ),
+    return await SENTIMENT_CACHE.get_or_set(
+        language_code=COMPREHEND_LANGUAGE_CODE,
+        text=text,
+        detect_sentiment_fn=batch_detect_sentiment,
     )
-    results = await asyncio.gather(sentiment_future)
-    result = results[0]
-    # self._sentiment_cache[text_hash] = result
-    return result
 
 async def add_sentiment_to_transcript(
-    message: Dict[str, Any],
+    transcript_segment: Dict[str, object],
     appsync_session: AppsyncAsyncClientSession,
+    add_transcript_tasks: List[asyncio.Task],
 ):
-    if not appsync_session.client.schema:
-        raise ValueError("invalid AppSync schema")
-    schema = DSLSchema(appsync_session.client.schema)
-        
-    transcript_segment = {
-        **transform_segment_to_add_transcript({**message}),
-    }
+    """Adds the sentiment to a transcript segment
+
+    Sentiment is detected while the segment without sentiment is being added
+    by add_transcript_tasks. The segment with sentiment is only added after
+    those tasks are done since the mutation replaces the whole segment
+    """
+    mutation_document = get_mutation_document(
+        appsync_session,
+        "addTranscriptSegment",
+        transcript_segment_fields,
+        transcript_segment_sentiment_fields,
+    )
 
     text = transcript_segment["Transcript"]
     LOGGER.debug("detect sentiment on text: [%s]", text)
@@ -217,33 +363,29 @@ async def add_sentiment_to_transcript(
             **transcript_segment,
             **sentiment
         }
-        
-        query = dsl_gql(
-            DSLMutation(
-                schema.Mutation.addTranscriptSegment.args(input=transcript_segment_with_sentiment).select(
-                    *transcript_segment_fields(schema),
-                    *transcript_segment_sentiment_fields(schema),
-                )
-            )
-        )
 
-        result = await execute_gql_query_with_retries(
-            query,
-            client_session=appsync_session,
-            logger=LOGGER,
+        if add_transcript_tasks:
+            await asyncio.wait(add_transcript_tasks)
+        result = await execute_mutation(
+            mutation_document,
+            transcript_segment_with_sentiment,
+            appsync_session=appsync_session,
         )
         
     return result
 
 def add_transcript_sentiment_analysis(
-    message: Dict[str, Any],
+    transcript_segment: Dict[str, object],
     appsync_session: AppsyncAsyncClientSession,
-) -> List[Coroutine]:
+    add_transcript_tasks: List[asyncio.Task],
+) -> List[asyncio.Task]:
     """Add Transcript Sentiment GraphQL Mutation"""
 
     tasks = []
 
-    task = add_sentiment_to_transcript(message, appsync_session)
+    task = asyncio.create_task(
+        add_sentiment_to_transcript(transcript_segment, appsync_session, add_transcript_tasks),
+    )
     tasks.append(task)
 
     return tasks
@@ -253,26 +395,19 @@ async def execute_create_call_mutation(
     appsync_session: AppsyncAsyncClientSession,
 ) -> Dict:
 
-    if not appsync_session.client.schema:
-        raise ValueError("invalid AppSync schema")
-    schema = DSLSchema(appsync_session.client.schema)
-    
-    query = dsl_gql(
-        DSLMutation(
-            schema.Mutation.createCall.args(input=message).select(
-                schema.CreateCallOutput.CallId
-            )
-        )
+    mutation_document = get_mutation_document(
+        appsync_session,
+        "createCall",
+        create_call_output_fields,
     )
     
-    result = await execute_gql_query_with_retries(
-                        query,
-                        client_session=appsync_session,
-                        logger=LOGGER,
+    result = await execute_mutation(
+                        mutation_document,
+                        message,
+                        appsync_session=appsync_session,
                     )
 
-    query_string = print_ast(query)
-    LOGGER.debug("query result", extra=dict(query=query_string, result=result))
+    log_query_result(mutation_document, result)
 
     return result
 
@@ -290,25 +425,15 @@ async def execute_update_call_status_mutation(
         # STARTED status is set by createCall - skip update mutation
         return {"ok": True}
 
-    if not appsync_session.client.schema:
-        raise ValueError("invalid AppSync schema")
-    schema = DSLSchema(appsync_session.client.schema)
+    mutation_document = get_mutation_document(appsync_session, "updateCallStatus", call_fields)
 
-    query = dsl_gql(
-        DSLMutation(
-            schema.Mutation.updateCallStatus.args(input={**message, "Status": status}).select(
-                *call_fields(schema)
-            )
-        )
-    )
-    result = await execute_gql_query_with_retries(
-                        query,
-                        client_session=appsync_session,
-                        logger=LOGGER,
+    result = await execute_mutation(
+                        mutation_document,
+                        {**message, "Status": status},
+                        appsync_session=appsync_session,
                     )
 
-    query_string = print_ast(query)
-    LOGGER.debug("query result", extra=dict(query=query_string, result=result))
+    log_query_result(mutation_document, result)
 
     return result
 
@@ -322,26 +447,15 @@ async def execute_add_s3_recording_mutation(
         error_message = "recording url doesn't exist in add s3 recording url event"
         raise TypeError(error_message)
 
-    if not appsync_session.client.schema:
-        raise ValueError("invalid AppSync schema")
-    schema = DSLSchema(appsync_session.client.schema)
-
-    query = dsl_gql(
-        DSLMutation(
-            schema.Mutation.updateRecordingUrl.args(
-                input={**message, "RecordingUrl": recording_url}
-            ).select(*call_fields(schema))
-        )
-    )
+    mutation_document = get_mutation_document(appsync_session, "updateRecordingUrl", call_fields)
     
-    result = await execute_gql_query_with_retries(
-                        query,
-                        client_session=appsync_session,
-                        logger=LOGGER,
+    result = await execute_mutation(
+                        mutation_document,
+                        {**message, "RecordingUrl": recording_url},
+                        appsync_session=appsync_session,
                     )
 
-    query_string = print_ast(query)
-    LOGGER.debug("query result", extra=dict(query=query_string, result=result))
+    log_query_result(mutation_document, result)
 
     return result
 
@@ -355,26 +469,15 @@ async def execute_update_agent_mutation(
         error_message = "AgentId doesn't exist in UPDATE_AGENT event"
         raise TypeError(error_message)
 
-    if not appsync_session.client.schema:
-        raise ValueError("invalid AppSync schema")
-    schema = DSLSchema(appsync_session.client.schema)
-
-    query = dsl_gql(
-        DSLMutation(
-            schema.Mutation.updateAgent.args(
-                input={**message, "AgentId": agentId}
-            ).select(*call_fields(schema))
-        )
-    )
+    mutation_document = get_mutation_document(appsync_session, "updateAgent", call_fields)
     
-    result = await execute_gql_query_with_retries(
-                        query,
-                        client_session=appsync_session,
-                        logger=LOGGER,
+    result = await execute_mutation(
+                        mutation_document,
+                        {**message, "AgentId": agentId},
+                        appsync_session=appsync_session,
                     )
 
-    query_string = print_ast(query)
-    LOGGER.debug("query result", extra=dict(query=query_string, result=result))
+    log_query_result(mutation_document, result)
 
     return result
 
@@ -403,7 +506,7 @@ def get_lex_agent_assist_message(bot_response):
     # Use markdown if present in appContext.altMessages.markdown session attr (Lex Web UI / QnABot)
     appContextJSON = bot_response.get("sessionState",{}).get("sessionAttributes",{}).get("appContext")
     if appContextJSON:
-        appContext = json.loads(appContextJSON)
+        appContext = orjson.loads(appContextJSON)
         markdown = appContext.get("altMessages",{}).get("markdown")
         if markdown:
             message = markdown
@@ -416,24 +519,28 @@ async def send_lex_agent_assist(
     transcript_segment_args: Dict[str, Any],
     content: str,
     appsync_session: AppsyncAsyncClientSession,
+    agent_assist_ctx: AgentAssistCtx,
 ):
     """Sends Lex Agent Assist Requests"""
-    if not appsync_session.client.schema:
-        raise ValueError("invalid AppSync schema")
-    schema = DSLSchema(appsync_session.client.schema)
+    mutation_document = get_mutation_document(
+        appsync_session,
+        "addTranscriptSegment",
+        transcript_segment_fields,
+    )
 
     call_id = transcript_segment_args["CallId"]
     
     LOGGER.debug("Bot Request: %s", content)
 
-    bot_response: RecognizeTextResponseTypeDef = await recognize_text_lex(
-        text=content,
-        session_id=call_id,
-        lex_client=LEXV2_CLIENT,
-        bot_id=LEX_BOT_ID,
-        bot_alias_id=LEX_BOT_ALIAS_ID,
-        locale_id=LEX_BOT_LOCALE_ID,
-    )
+    async with LEX_SEMAPHORE:
+        bot_response: RecognizeTextResponseTypeDef = await recognize_text_lex(
+            text=content,
+            session_id=call_id,
+            lex_client=agent_assist_ctx.lex_client,
+            bot_id=agent_assist_ctx.lex_bot_id,
+            bot_alias_id=agent_assist_ctx.lex_bot_alias_id,
+            locale_id=agent_assist_ctx.lex_bot_locale_id,
+        )
     
     LOGGER.debug("Bot Response: ", extra=bot_response)
 
@@ -442,93 +549,56 @@ async def send_lex_agent_assist(
     if transcript:
         transcript_segment = {**transcript_segment_args, "Transcript": transcript}
 
-        query = dsl_gql(
-            DSLMutation(
-                schema.Mutation.addTranscriptSegment.args(input=transcript_segment).select(
-                    *transcript_segment_fields(schema),
-                )
-            )
-        )
-
-        result = await execute_gql_query_with_retries(
-            query,
-            client_session=appsync_session,
-            logger=LOGGER,
-        )
-
-    return result
-
-def add_lex_agent_assistances(
-    message: Dict[str, Any],
-    appsync_session: AppsyncAsyncClientSession,
-) -> List[Coroutine]:
-    """Add Lex Agent Assist GraphQL Mutations"""
-    # pylint: disable=too-many-locals
-    call_id: str = message["CallId"]
-    channel: str = message["Channel"]
-    is_partial: bool = message["IsPartial"]
-    segment_id: str = message["SegmentId"]
-    start_time: float = message["StartTime"]
-    end_time: float = message["EndTime"]
-    end_time = float(end_time) + 0.001 # UI sort order
-    transcript: str = message["Transcript"]
-    created_at = datetime.utcnow().astimezone().isoformat()
-
-    send_lex_agent_assist_args = []
-    if (channel == "CALLER" and not is_partial):
-        send_lex_agent_assist_args.append(
-                dict(
-                    content=transcript,
-                    transcript_segment_args=dict(
-                        CallId=call_id,
-                        Channel="AGENT_ASSISTANT",
-                        CreatedAt=created_at,
-                        EndTime=end_time,
-                        ExpiresAfter=get_ttl(),
-                        IsPartial=is_partial,
-                        SegmentId=str(uuid.uuid4()),
-                        StartTime=start_time,
-                        Status="TRANSCRIBING",
-                    ),
-                )
-            )
-            
-    tasks = []
-    for agent_assist_args in send_lex_agent_assist_args:
-        task = send_lex_agent_assist(
+        result = await execute_mutation(
+            mutation_document,
+            transcript_segment,
             appsync_session=appsync_session,
-            **agent_assist_args,
         )
-        tasks.append(task)
 
-    return tasks
+    return result
 
 ##########################################################################
 # Lambda Agent Assist
 ##########################################################################
 
-def get_lambda_agent_assist_message(lambda_response):
+async def get_lambda_agent_assist_message(lambda_response):
     message = ""
     try:
-        payload = json.loads(lambda_response.get("Payload").read().decode("utf-8"))
-        # Lambda result payload should include field 'message'
-        message = payload["message"]
-    except Exception as error:
+        # orjson parses the payload bytes without decoding them first
+        payload = orjson.loads(await lambda_response["Payload"].read())
+    except Exception as error:  # pylint: disable=broad-except
+        LOGGER.error("Agent assist Lambda result payload parsing exception: %s", error)
+        return message
+
+    if lambda_response.get("FunctionError"):
+        LOGGER.error(
+            "Agent assist Lambda function error",
+            extra=dict(function_error=lambda_response["FunctionError"], payload=payload),
+        )
+        return message
+
+    # Lambda result payload should include field 'message'
+    if not isinstance(payload, dict) or "message" not in payload:
         LOGGER.error(
-            "Agent assist Lambda result payload parsing exception. Lambda must return object with key 'message'",
-            extra=error,
+            "Agent assist Lambda result payload error. Lambda must return object with key 'message'",
         )
+        return message
+
+    message = payload.get("message") or ""
     return message
 
 async def send_lambda_agent_assist(
     transcript_segment_args: Dict[str, Any],
     content: str,
     appsync_session: AppsyncAsyncClientSession,
+    agent_assist_ctx: AgentAssistCtx,
 ):
     """Sends Lambda Agent Assist Requests"""
-    if not appsync_session.client.schema:
-        raise ValueError("invalid AppSync schema")
-    schema = DSLSchema(appsync_session.client.schema)
+    mutation_document = get_mutation_document(
+        appsync_session,
+        "addTranscriptSegment",
+        transcript_segment_fields,
+    )
 
     call_id = transcript_segment_args["CallId"]
 
@@ -540,80 +610,217 @@ async def send_lambda_agent_assist(
     
     LOGGER.debug("Agent Assist Lambda Request: %s", content)
 
-    lambda_response: InvocationResponseTypeDef = await invoke_lambda(
-        payload=payload,
-        lambda_client=LAMBDA_CLIENT,
-        lambda_agent_assist_function_arn=LAMBDA_AGENT_ASSIST_FUNCTION_ARN,
-    )
+    async with LAMBDA_SEMAPHORE:
+        lambda_response: InvocationResponseTypeDef = await invoke_lambda(
+            payload=payload,
+            lambda_client=agent_assist_ctx.lambda_client,
+            lambda_agent_assist_function_arn=agent_assist_ctx.lambda_agent_assist_function_arn,
+        )
     
     LOGGER.debug("Agent Assist Lambda Response: ", extra=lambda_response)
 
     result = {}
-    transcript = get_lambda_agent_assist_message(lambda_response)
+    transcript = await get_lambda_agent_assist_message(lambda_response)
     if transcript:
         transcript_segment = {**transcript_segment_args, "Transcript": transcript}
 
-        query = dsl_gql(
-            DSLMutation(
-                schema.Mutation.addTranscriptSegment.args(input=transcript_segment).select(
-                    *transcript_segment_fields(schema),
-                )
-            )
-        )
-
-        result = await execute_gql_query_with_retries(
-            query,
-            client_session=appsync_session,
-            logger=LOGGER,
+        result = await execute_mutation(
+            mutation_document,
+            transcript_segment,
+            appsync_session=appsync_session,
         )
 
     return result
 
-def add_lambda_agent_assistances(
-    message: Dict[str, Any],
-    appsync_session: AppsyncAsyncClientSession,
-) -> List[Coroutine]:
-    """Add Lambda Agent Assist GraphQL Mutations"""
-    # pylint: disable=too-many-locals
-    call_id: str = message["CallId"]
+##########################################################################
+# Agent Assist
+##########################################################################
+def _build_agent_assist_args(message: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """Builds the agent assist request args shared by Lex and Lambda agent assist
+
+    Returns None if the segment doesn't get agent assistance. It is checked
+    before building the args since most segments are partials. Each agent
+    assist request adds its own segment so the segment id is set per request
+    """
     channel: str = message["Channel"]
     is_partial: bool = message["IsPartial"]
-    segment_id: str = message["SegmentId"]
-    start_time: float = message["StartTime"]
-    end_time: float = message["EndTime"]
-    end_time = float(end_time) + 0.001 # UI sort order
-    transcript: str = message["Transcript"]
-    created_at = datetime.utcnow().astimezone().isoformat()
-
-    send_lambda_agent_assist_args = []
-    if (channel == "CALLER" and not is_partial):
-        send_lambda_agent_assist_args.append(
-                dict(
-                    content=transcript,
-                    transcript_segment_args=dict(
-                        CallId=call_id,
-                        Channel="AGENT_ASSISTANT",
-                        CreatedAt=created_at,
-                        EndTime=end_time,
-                        ExpiresAfter=get_ttl(),
-                        IsPartial=is_partial,
-                        SegmentId=str(uuid.uuid4()),
-                        StartTime=start_time,
-                        Status="TRANSCRIBING",
-                    ),
-                )
-            )
+    if channel != "CALLER" or is_partial:
+        return None
+
+    return dict(
+        content=message["Transcript"],
+        transcript_segment_args=dict(
+            CallId=message["CallId"],
+            Channel="AGENT_ASSISTANT",
+            CreatedAt=_now_iso(),
+            EndTime=float(message["EndTime"]) + 0.001, # UI sort order
+            ExpiresAfter=get_ttl(),
+            IsPartial=is_partial,
+            StartTime=message["StartTime"],
+            Status="TRANSCRIBING",
+        ),
+    )
+
+def add_agent_assistances(
+    message: Dict[str, Any],
+    appsync_session: AppsyncAsyncClientSession,
+    agent_assist_ctx: AgentAssistCtx,
+) -> List[asyncio.Task]:
+    """Add Lex and Lambda Agent Assist GraphQL Mutations"""
+    send_agent_assist_fns = []
+    if agent_assist_ctx.is_lex_agent_assist_enabled:
+        send_agent_assist_fns.append(send_lex_agent_assist)
+    if agent_assist_ctx.is_lambda_agent_assist_enabled:
+        send_agent_assist_fns.append(send_lambda_agent_assist)
+    if not send_agent_assist_fns:
+        return []
+
+    agent_assist_args = _build_agent_assist_args(message)
+    if agent_assist_args is None:
+        return []
 
     tasks = []
-    for agent_assist_args in send_lambda_agent_assist_args:
-        task = send_lambda_agent_assist(
-            appsync_session=appsync_session,
-            **agent_assist_args,
+    for send_agent_assist_fn in send_agent_assist_fns:
+        task = asyncio.create_task(
+            send_agent_assist_fn(
+                content=agent_assist_args["content"],
+                transcript_segment_args={
+                    **agent_assist_args["transcript_segment_args"],
+                    "SegmentId": _new_segment_id(),
+                },
+                appsync_session=appsync_session,
+                agent_assist_ctx=agent_assist_ctx,
+            ),
         )
         tasks.append(task)
 
     return tasks
-    
+
+##########################################################################
+# Event Handlers
+##########################################################################
+async def handle_create_call_event(
+    message: Dict[str, Any],
+    appsync_session: AppsyncAsyncClientSession,
+    agent_assist_ctx: AgentAssistCtx,
+) -> List[Any]:
+    # pylint: disable=unused-argument
+    # CREATE CALL
+    LOGGER.debug("CREATE CALL") 
+    response = await execute_create_call_mutation(
+                        message=message, 
+                        appsync_session=appsync_session
+                    )
+    return [response]
+
+async def handle_update_call_status_event(
+    message: Dict[str, Any],
+    appsync_session: AppsyncAsyncClientSession,
+    agent_assist_ctx: AgentAssistCtx,
+) -> List[Any]:
+    # pylint: disable=unused-argument
+    # UPDATE STATUS
+    LOGGER.debug("update status")
+    response = await execute_update_call_status_mutation(
+                            message=message,
+                            appsync_session=appsync_session
+                    )
+    return [response]
+
+async def handle_add_transcript_segment_event(
+    message: Dict[str, Any],
+    appsync_session: AppsyncAsyncClientSession,
+    agent_assist_ctx: AgentAssistCtx,
+) -> List[Any]:
+    # UPDATE STATUS
+    LOGGER.debug("Add Transcript Segment")
+    # shared by the mutations with and without sentiment
+    transcript_segment = transform_segment_to_add_transcript(message)
+
+    add_transcript_tasks = add_transcript_segments(
+        transcript_segment=transcript_segment,
+        appsync_session=appsync_session,
+    )
+
+    # most segments are partials which don't get sentiment or agent assistance
+    if message.get("IsPartial", True):
+        return await asyncio.gather(*add_transcript_tasks, return_exceptions=True)
+
+    add_transcript_sentiment_tasks = []
+    if IS_SENTIMENT_ANALYSIS_ENABLED:
+        add_transcript_sentiment_tasks = add_transcript_sentiment_analysis(
+            transcript_segment=transcript_segment,
+            appsync_session=appsync_session,
+            add_transcript_tasks=add_transcript_tasks,
+        )
+
+    add_agent_assists_tasks = add_agent_assistances(
+            message=message,
+            appsync_session=appsync_session,
+            agent_assist_ctx=agent_assist_ctx,
+        )
+
+    return await asyncio.gather(
+        *add_transcript_tasks,
+        *add_transcript_sentiment_tasks,
+        *add_agent_assists_tasks,
+        return_exceptions=True,
+    )
+
+async def handle_add_s3_recording_event(
+    message: Dict[str, Any],
+    appsync_session: AppsyncAsyncClientSession,
+    agent_assist_ctx: AgentAssistCtx,
+) -> List[Any]:
+    # pylint: disable=unused-argument
+    # ADD S3 RECORDING URL 
+    LOGGER.debug("Add recording url")
+    response = await execute_add_s3_recording_mutation(
+                            message=message,
+                            appsync_session=appsync_session
+                    )
+    return [response]
+
+async def handle_update_agent_event(
+    message: Dict[str, Any],
+    appsync_session: AppsyncAsyncClientSession,
+    agent_assist_ctx: AgentAssistCtx,
+) -> List[Any]:
+    # pylint: disable=unused-argument
+    # UPDATE AGENT 
+    LOGGER.debug("Update AgentId for call")
+    response = await execute_update_agent_mutation(
+                            message=message,
+                            appsync_session=appsync_session
+                    )
+    return [response]
+
+EventHandlerType = Callable[
+    [Dict[str, Any], AppsyncAsyncClientSession, AgentAssistCtx],
+    Awaitable[List[Any]],
+]
+
+# maps the event type to the handler that executes its mutations
+EVENT_TYPE_TO_HANDLER: Dict[str, EventHandlerType] = {
+    "START": handle_create_call_event,
+    **{
+        event_type: handle_update_call_status_event
+        for event_type in [
+            "START_TRANSCRIPT",
+            "CONTINUE_TRANSCRIPT",
+            "CONTINUE",
+            "END_TRANSCRIPT",
+            "TRANSCRIPT_ERROR",
+            "ERROR",
+            "END",
+            "ADD_CHANNEL_S3_RECORDING_URL",
+        ]
+    },
+    "ADD_TRANSCRIPT_SEGMENT": handle_add_transcript_segment_event,
+    "ADD_S3_RECORDING_URL": handle_add_s3_recording_event,
+    "UPDATE_AGENT": handle_update_agent_event,
+}
+
 async def execute_process_event_api_mutation(
     message: Dict[str, Any],
     appsync_session: AppsyncAsyncClientSession,
@@ -621,24 +828,12 @@ async def execute_process_event_api_mutation(
 ) -> Dict[Literal["successes", "errors"], List]:
 
     """Executes AppSync API Mutation"""
-    # pylint: disable=global-statement
-    global LEXV2_CLIENT
-    global IS_LEX_AGENT_ASSIST_ENABLED
-    global LEX_BOT_ID
-    global LEX_BOT_ALIAS_ID
-    global LEX_BOT_LOCALE_ID
-    global LAMBDA_CLIENT
-    global LAMBDA_AGENT_ASSIST_FUNCTION_ARN
-    # pylint: enable=global-statement
-
-    LEXV2_CLIENT = agent_assist_args.get("lex_client")
-    IS_LEX_AGENT_ASSIST_ENABLED = LEXV2_CLIENT is not None
-    LEX_BOT_ID = agent_assist_args.get("lex_bot_id", "")
-    LEX_BOT_ALIAS_ID = agent_assist_args.get("lex_bot_alias_id", "")
-    LEX_BOT_LOCALE_ID = agent_assist_args.get("lex_bot_locale_id", "")
-    LAMBDA_CLIENT = agent_assist_args.get("lambda_client")
-    IS_LAMBDA_AGENT_ASSIST_ENABLED = LAMBDA_CLIENT is not None
-    LAMBDA_AGENT_ASSIST_FUNCTION_ARN = agent_assist_args.get("lambda_agent_assist_function_arn", "")   
+    _validate_session(appsync_session)
+    agent_assist_ctx = AgentAssistCtx.from_agent_assist_args(agent_assist_args)
+
+    if IS_SENTIMENT_ANALYSIS_ENABLED:
+        # the async Comprehend client is created by the Lambda function
+        init_sentiment_batcher(agent_assist_args["comprehend_client"])
 
     return_value: Dict[Literal["successes", "errors"], List] = {
         "successes": [],
@@ -648,110 +843,19 @@ async def execute_process_event_api_mutation(
     message["ExpiresAfter"] = get_ttl()
     event_type = message.get("EventType", "")
 
-    if event_type == "START":
-        # CREATE CALL
-        LOGGER.debug("CREATE CALL") 
-
-        response = await execute_create_call_mutation(
-                            message=message, 
-                            appsync_session=appsync_session
-                        )
-                        
-        if isinstance(response, Exception):
-            return_value["errors"].append(response)
-        else:
-            return_value["successes"].append(response)
-
-    elif event_type in [
-        "START_TRANSCRIPT",
-        "CONTINUE_TRANSCRIPT",
-        "CONTINUE",
-        "END_TRANSCRIPT",
-        "TRANSCRIPT_ERROR",
-        "ERROR",
-        "END",
-        "ADD_CHANNEL_S3_RECORDING_URL",]:
-        # UPDATE STATUS
-        LOGGER.debug("update status")
-        response = await execute_update_call_status_mutation(
-                                message=message,
-                                appsync_session=appsync_session
-                        )
-        if isinstance(response, Exception):
-            return_value["errors"].append(response)
-        else:
-            return_value["successes"].append(response)
-
-
-    elif event_type == "ADD_TRANSCRIPT_SEGMENT":
-        # UPDATE STATUS
-        LOGGER.debug("Add Transcript Segment")
-        add_transcript_tasks = add_transcript_segments(
-            message=message,
-            appsync_session=appsync_session,
-        )
-
-        add_transcript_sentiment_tasks = []
-        if IS_SENTIMENT_ANALYSIS_ENABLED and not message.get("IsPartial", True):
-            add_transcript_sentiment_tasks = add_transcript_sentiment_analysis(
-                message=message,
-                appsync_session=appsync_session,
-            )
-
-        add_lex_agent_assists_tasks = []
-        if IS_LEX_AGENT_ASSIST_ENABLED:
-            add_lex_agent_assists_tasks = add_lex_agent_assistances(
-                    message=message,
-                    appsync_session=appsync_session,
-                )
-
-        add_lambda_agent_assists_tasks = []
-        if IS_LAMBDA_AGENT_ASSIST_ENABLED:
-            add_lambda_agent_assists_tasks = add_lambda_agent_assistances(
-                    message=message,
-                    appsync_session=appsync_session,
-                )
-
-        task_responses = await asyncio.gather(
-            *add_transcript_tasks,
-            *add_transcript_sentiment_tasks,
-            *add_lex_agent_assists_tasks,
-            *add_lambda_agent_assists_tasks,
-            return_exceptions=True,
-        )
-
-        for response in task_responses:
-            if isinstance(response, Exception):
-                return_value["errors"].append(response)
-            else:
-                return_value["successes"].append(response)
-
-    elif event_type == "ADD_S3_RECORDING_URL":
-        # ADD S3 RECORDING URL 
-        LOGGER.debug("Add recording url")
-        response = await execute_add_s3_recording_mutation(
-                                message=message,
-                                appsync_session=appsync_session
-                        )
-        if isinstance(response, Exception):
-            return_value["errors"].append(response)
-        else:
-            return_value["successes"].append(response)
+    event_handler = EVENT_TYPE_TO_HANDLER.get(event_type)
+    if event_handler is None:
+        LOGGER.warning("unknown event type [%s]", event_type)
+        return return_value
 
-    elif event_type == "UPDATE_AGENT":
-        # UPDATE AGENT 
-        LOGGER.debug("Update AgentId for call")
-        response = await execute_update_agent_mutation(
-                                message=message,
-                                appsync_session=appsync_session
-                        )
+    responses = await event_handler(message, appsync_session, agent_assist_ctx)
+    for response in responses:
         if isinstance(response, Exception):
             return_value["errors"].append(response)
         else:
             return_value["successes"].append(response)
 
-    else:
-        LOGGER.warning("unknown event type [%s]", event_type)
-        
+    if SENTIMENT_CACHE is not None:
+        SENTIMENT_CACHE.persist_if_due()
 
     return return_value
@@ -4,14 +4,17 @@
 """ Transcription Passthrough Lambda Function
 """
 import asyncio
+from contextlib import AsyncExitStack
 from os import environ, getenv
-from typing import TYPE_CHECKING, Dict, List
+from typing import TYPE_CHECKING, Dict, List, Optional
 
 # third-party imports from Lambda layer
 from aws_lambda_powertools import Logger
 from aws_lambda_powertools.utilities.typing import LambdaContext
 import boto3
 from botocore.config import Config as BotoCoreConfig
+from aiobotocore.config import AioConfig
+from aiobotocore.session import get_session as get_aiobotocore_session
 
 # imports from Lambda layer
 # pylint: disable=import-error
@@ -28,7 +31,8 @@ from event_processor import execute_process_transcribe_event_api_mutation
 if TYPE_CHECKING:
     from mypy_boto3_dynamodb.service_resource import DynamoDBServiceResource, Table as DynamoDbTable
     from mypy_boto3_lexv2_runtime.client import LexRuntimeV2Client
-    from mypy_boto3_lambda.client import LambdaClient
+    from types_aiobotocore_lambda.client import LambdaClient
+    from types_aiobotocore_comprehend.client import ComprehendClient
     from boto3 import Session as Boto3Session
 else:
     Boto3Session = object
@@ -36,16 +40,29 @@ else:
     DynamoDbTable = object
     LexRuntimeV2Client = object
     LambdaClient = object
+    ComprehendClient = object
 
 
 APPSYNC_GRAPHQL_URL = environ["APPSYNC_GRAPHQL_URL"]
 APPSYNC_CLIENT = AppsyncAioGqlClient(url=APPSYNC_GRAPHQL_URL, fetch_schema_from_transport=True)
 
 BOTO3_SESSION: Boto3Session = boto3.Session()
+# the default pool of 10 connections serializes the concurrent requests of a batch
 CLIENT_CONFIG = BotoCoreConfig(
     retries={"mode": "adaptive", "max_attempts": 3},
+    max_pool_connections=50,
 )
 
+# aiobotocore clients are entered once and kept open in the Lambda execution
+# environment so that warm invocations reuse the client connection pool
+AIOBOTOCORE_SESSION = get_aiobotocore_session()
+AIO_CLIENT_CONFIG = AioConfig(
+    retries={"mode": "adaptive", "max_attempts": 3},
+    max_pool_connections=50,
+)
+AIO_CLIENTS_EXIT_STACK = AsyncExitStack()
+AIO_CLIENTS_LOCK = asyncio.Lock()
+
 STATE_DYNAMODB_TABLE_NAME = environ["STATE_DYNAMODB_TABLE_NAME"]
 STATE_DYNAMODB_RESOURCE: DynamoDBServiceResource = BOTO3_SESSION.resource(
     "dynamodb",
@@ -66,15 +83,14 @@ LEX_BOT_ALIAS_ID = environ["LEX_BOT_ALIAS_ID"]
 LEX_BOT_LOCALE_ID = environ["LEX_BOT_LOCALE_ID"]
 
 IS_LAMBDA_AGENT_ASSIST_ENABLED = getenv("IS_LAMBDA_AGENT_ASSIST_ENABLED", "true").lower() == "true"
-if IS_LAMBDA_AGENT_ASSIST_ENABLED:
-    LAMBDA_CLIENT: LambdaClient = BOTO3_SESSION.client(
-        "lambda",
-        config=CLIENT_CONFIG,
-    )
-else:
-    LAMBDA_CLIENT = None
+# async client created on first use by init_aio_clients()
+LAMBDA_CLIENT: Optional[LambdaClient] = None
 LAMBDA_AGENT_ASSIST_FUNCTION_ARN = environ["LAMBDA_AGENT_ASSIST_FUNCTION_ARN"]
 
+IS_SENTIMENT_ANALYSIS_ENABLED = getenv("IS_SENTIMENT_ANALYSIS_ENABLED", "true").lower() == "true"
+# async client created on first use by init_aio_clients()
+COMPREHEND_CLIENT: Optional[ComprehendClient] = None
+
 
 CALL_AUDIO_SOURCE = getenv("CALL_AUDIO_SOURCE")
 MUTATION_FUNCTION_MAPPING = {
@@ -89,6 +105,25 @@ LOGGER = Logger(location="%(filename)s:%(lineno)d - %(funcName)s()")
 
 EVENT_LOOP = asyncio.get_event_loop()
 
+async def init_aio_clients() -> None:
+    """Creates the enabled async Lambda Agent Assist and Comprehend clients
+
+    The clients are created on the first invocation and reused by warm invocations
+    """
+    # pylint: disable=global-statement
+    global LAMBDA_CLIENT
+    global COMPREHEND_CLIENT
+    async with AIO_CLIENTS_LOCK:
+        if IS_LAMBDA_AGENT_ASSIST_ENABLED and LAMBDA_CLIENT is None:
+            LAMBDA_CLIENT = await AIO_CLIENTS_EXIT_STACK.enter_async_context(
+                AIOBOTOCORE_SESSION.create_client("lambda", config=AIO_CLIENT_CONFIG),
+            )
+        if IS_SENTIMENT_ANALYSIS_ENABLED and COMPREHEND_CLIENT is None:
+            COMPREHEND_CLIENT = await AIO_CLIENTS_EXIT_STACK.enter_async_context(
+                AIOBOTOCORE_SESSION.create_client("comprehend", config=AIO_CLIENT_CONFIG),
+            )
+
+
 async def update_state(event, event_processor_results) -> Dict[str, object]:
     """Updates the Lambda Tumbling Window State"""
     outgoing_state = event.get("state", {})
@@ -114,6 +149,7 @@ async def update_state(event, event_processor_results) -> Dict[str, object]:
 
 async def process_event(event) -> Dict[str, List]:
     """Processes a Batch of Transcript Records""" 
+    await init_aio_clients()
     async with TranscriptBatchProcessor(
         appsync_client=APPSYNC_CLIENT,
         agent_assist_args=dict(
@@ -122,7 +158,8 @@ async def process_event(event) -> Dict[str, List]:
             lex_bot_alias_id=LEX_BOT_ALIAS_ID,
             lex_bot_locale_id=LEX_BOT_LOCALE_ID,
             lambda_client=LAMBDA_CLIENT,
-            lambda_agent_assist_function_arn=LAMBDA_AGENT_ASSIST_FUNCTION_ARN
+            lambda_agent_assist_function_arn=LAMBDA_AGENT_ASSIST_FUNCTION_ARN,
+            comprehend_client=COMPREHEND_CLIENT,
         ),
         # called for each record right before the context manager exits
         api_mutation_fn=MUTATION_FUNCTION_NAME,
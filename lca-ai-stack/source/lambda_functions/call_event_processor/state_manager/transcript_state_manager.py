@@ -2,6 +2,7 @@
 # SPDX-License-Identifier: Apache-2.0
 """Call State Manager"""
 from datetime import datetime, timedelta, timezone
+import logging
 from statistics import fmean
 import traceback
 from typing import TYPE_CHECKING, Any, Dict, Final, List, Set
@@ -233,10 +234,12 @@ class TranscriptStateManager(StateManager):
                         client_session=appsync_session,
                         logger=LOGGER,
                     )
-                    query_string = print_ast(query)
-                    LOGGER.debug(
-                        "transcript state mutation", extra=dict(query=query_string, result=result)
-                    )
+                    if LOGGER.isEnabledFor(logging.DEBUG):
+                        query_string = print_ast(query)
+                        LOGGER.debug(
+                            "transcript state mutation",
+                            extra=dict(query=query_string, result=result),
+                        )
             except Exception as error:  # pylint: disable=broad-except
                 LOGGER.error("error in call state graphql update: [%s]", error)
                 LOGGER.exception("exception in call state graphql update")
@@ -1,13 +1,61 @@
 # Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
 # SPDX-License-Identifier: Apache-2.0
 """AppSync Async IO Gql Client"""
+from typing import Final, Optional
 from urllib.parse import urlparse
 
+import aiohttp
 from gql.client import Client
 from gql.transport.aiohttp import AIOHTTPTransport
 from gql.transport.appsync_auth import AppSyncIAMAuthentication
 
 
+class PersistentConnectorAIOHTTPTransport(AIOHTTPTransport):
+    """AIOHTTP Transport with a connection pool that outlives its sessions
+
+    The aiohttp session is still created and closed by each client session
+    but its TCP connector is created once and not owned by the session. This
+    keeps the TLS connections to AppSync alive across client sessions and warm
+    Lambda invocations.
+    """
+
+    DEFAULT_CONNECTOR_LIMIT: Final[int] = 100
+    DEFAULT_KEEPALIVE_TIMEOUT_IN_SECS: Final[float] = 75
+
+    def __init__(
+        self,
+        connector_limit: int = DEFAULT_CONNECTOR_LIMIT,
+        keepalive_timeout_in_secs: float = DEFAULT_KEEPALIVE_TIMEOUT_IN_SECS,
+        **kwargs,
+    ):
+        super().__init__(**kwargs)
+        self._connector_limit = connector_limit
+        self._keepalive_timeout_in_secs = keepalive_timeout_in_secs
+        self._connector: Optional[aiohttp.TCPConnector] = None
+
+    async def connect(self) -> None:
+        # the connector is created in the running event loop on first use
+        if self._connector is None or self._connector.closed:
+            self._connector = aiohttp.TCPConnector(
+                limit=self._connector_limit,
+                keepalive_timeout=self._keepalive_timeout_in_secs,
+            )
+        self.client_session_args = {
+            **(self.client_session_args or {}),
+            "connector": self._connector,
+            "connector_owner": False,
+        }
+
+        await super().connect()
+
+    async def close(self) -> None:
+        # the base transport waits for the SSL transports to be closed which
+        # never happens when the session doesn't own the connector
+        if self.session is not None:
+            await self.session.close()
+        self.session = None
+
+
 class AppsyncAioGqlClient(Client):
     """AppSync Async IO Gql Client"""
 
@@ -18,6 +66,6 @@ class AppsyncAioGqlClient(Client):
     ):
         host = str(urlparse(url).netloc)
         auth = AppSyncIAMAuthentication(host=host)
-        transport = AIOHTTPTransport(url=url, auth=auth)
+        transport = PersistentConnectorAIOHTTPTransport(url=url, auth=auth)
 
         super().__init__(transport=transport, **kwargs)
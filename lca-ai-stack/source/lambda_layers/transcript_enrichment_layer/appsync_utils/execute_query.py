@@ -4,7 +4,7 @@
 import asyncio
 import logging
 from random import randint
-from typing import Callable, Dict, Optional, Union
+from typing import Any, Callable, Dict, Optional, Union
 
 
 from graphql import print_ast
@@ -23,6 +23,7 @@ async def execute_gql_query_with_retries(
     logger: logging.Logger = LOGGER,
     should_ignore_exception_fn: Callable[[Exception], bool] = lambda _: False,
     ignored_exception_response: Optional[Dict[str, object]] = None,
+    variable_values: Optional[Dict[str, Any]] = None,
 ) -> Union[Dict[str, object], ExecutionResult]:
     """Executes a query asynchronously with retries
 
@@ -42,9 +43,11 @@ async def execute_gql_query_with_retries(
         exception to verify it it should be ignored
     :param ignored_exception_response: Response to send when an exception has
         been ignored
+    :param variable_values: Values of the variables defined in the query
     """
     # pylint: disable=too-many-arguments
-    query_string = print_ast(query)
+    # printing the query is only needed for debug logging or on errors
+    query_string = print_ast(query) if logger.isEnabledFor(logging.DEBUG) else None
     _ignored_exception_response = (
         DEFAULT_IGNORED_EXCEPTION_RESPONSE
         if ignored_exception_response is None
@@ -59,15 +62,17 @@ async def execute_gql_query_with_retries(
                 retries,
                 extra=dict(query=query_string),
             )
-            result = await client_session.execute(query)
+            result = await client_session.execute(query, variable_values=variable_values)
             break
         except Exception as error:  # pylint: disable=broad-except
+            if query_string is None:
+                query_string = print_ast(query)
             if retries >= max_retries:
                 logger.error(
                     "max retries on query - retries: [%d] - error: [%s]",
                     retries,
                     error,
-                    extra=dict(query=query_string),
+                    extra=dict(query=query_string, variables=variable_values),
                 )
                 logger.exception("gql query exception")
                 raise
@@ -85,7 +90,7 @@ async def execute_gql_query_with_retries(
                 retries,
                 sleep_time,
                 error,
-                extra=dict(query=query_string),
+                extra=dict(query=query_string, variables=variable_values),
             )
             await asyncio.sleep(sleep_time)
 
@@ -2,20 +2,20 @@
 # SPDX-License-Identifier: Apache-2.0
 """ Async Lambda Client Utilities
 """
-import json
 import asyncio
 from typing import TYPE_CHECKING, Any, Dict
 
 # third-party imports from Lambda layer
 from aws_lambda_powertools import Logger
+import orjson
 
 
 LOGGER = Logger(child=True, location="%(filename)s:%(lineno)d - %(funcName)s()")
 
 
 if TYPE_CHECKING:
-    from mypy_boto3_lambda.type_defs import InvocationResponseTypeDef
-    from mypy_boto3_lambda.client import LambdaClient
+    from types_aiobotocore_lambda.type_defs import InvocationResponseTypeDef
+    from types_aiobotocore_lambda.client import LambdaClient
 else:
     LambdaClient = object
     InvocationResponseTypeDef = object
@@ -27,21 +27,17 @@ async def invoke_lambda(
     lambda_agent_assist_function_arn: str,
     max_retries: int = 3,
 ) -> InvocationResponseTypeDef:
-    """Runs Lambda Invoke in the Async Event Loop"""
+    """Invokes a Lambda Function using an async (aiobotocore) Lambda client"""
     # pylint: disable=too-many-arguments
     retry_count = 0
     lambda_responded: bool = False
     lambda_response: InvocationResponseTypeDef
     while not lambda_responded and retry_count < max_retries:
         try:
-            event_loop = asyncio.get_event_loop()
-            lambda_response = await event_loop.run_in_executor(
-                None,
-                lambda: lambda_client.invoke(
-                    FunctionName=lambda_agent_assist_function_arn,
-                    InvocationType='RequestResponse',
-                    Payload = json.dumps(payload)
-                ),
+            lambda_response = await lambda_client.invoke(
+                FunctionName=lambda_agent_assist_function_arn,
+                InvocationType='RequestResponse',
+                Payload = orjson.dumps(payload)
             )
             lambda_responded = True
         except lambda_client.exceptions.ResourceConflictException as error:
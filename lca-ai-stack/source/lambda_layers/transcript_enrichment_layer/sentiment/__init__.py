@@ -1,6 +1,12 @@
 # Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
 # SPDX-License-Identifier: Apache-2.0
 """Sentiment Analysis"""
+from .sentiment_batcher import SentimentBatcher
+from .sentiment_cache import SentimentCache
 from .weighted_sentiment import ComprehendWeightedSentiment
 
-__all__ = ["ComprehendWeightedSentiment"]
+__all__ = [
+    "ComprehendWeightedSentiment",
+    "SentimentBatcher",
+    "SentimentCache",
+]
@@ -0,0 +1,154 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: Apache-2.0
+"""Comprehend Sentiment Micro Batcher"""
+import asyncio
+from typing import TYPE_CHECKING, Final, List, Optional, Set, Tuple
+
+from aws_lambda_powertools import Logger
+
+
+if TYPE_CHECKING:
+    from types_aiobotocore_comprehend.client import ComprehendClient
+    from types_aiobotocore_comprehend.type_defs import BatchDetectSentimentItemResultTypeDef
+    from types_aiobotocore_comprehend.literals import LanguageCodeType
+else:
+    ComprehendClient = object
+    BatchDetectSentimentItemResultTypeDef = object
+    LanguageCodeType = object
+
+LOGGER = Logger(child=True, location="%(filename)s:%(lineno)d - %(funcName)s()")
+
+BatchItemType = Tuple[str, "asyncio.Future[BatchDetectSentimentItemResultTypeDef]"]
+
+
+class SentimentBatcher:
+    """Comprehend Sentiment Micro Batcher
+
+    Coalesces concurrent sentiment requests into Comprehend BatchDetectSentiment
+    API calls. Requests are queued and sent as a batch when the batch is full
+    or when the batch window expires, whichever comes first. Callers await the
+    result of their own text as if they were calling DetectSentiment.
+    """
+
+    # BatchDetectSentiment accepts up to 25 documents per request
+    MAX_BATCH_SIZE: Final[int] = 25
+    DEFAULT_BATCH_WINDOW_IN_SECS: Final[float] = 0.020
+    DEFAULT_MAX_CONCURRENT_BATCHES: Final[int] = 20
+
+    def __init__(
+        self,
+        comprehend_client: ComprehendClient,
+        language_code: LanguageCodeType,
+        max_batch_size: int = MAX_BATCH_SIZE,
+        batch_window_in_secs: float = DEFAULT_BATCH_WINDOW_IN_SECS,
+        max_concurrent_batches: int = DEFAULT_MAX_CONCURRENT_BATCHES,
+    ) -> None:
+        """Initializes the Sentiment Batcher
+
+        :param comprehend_client: aiobotocore Comprehend client
+        :param language_code: Comprehend language code of the batched texts
+        :param max_batch_size: maximum number of texts sent in a single request
+        :param batch_window_in_secs: time to wait for concurrent requests to
+        join a batch that is not full
+        :param max_concurrent_batches: maximum number of batch requests sent to
+        Comprehend at the same time
+        """
+        self._comprehend_client = comprehend_client
+        self._language_code = language_code
+        self._max_batch_size = min(max_batch_size, self.MAX_BATCH_SIZE)
+        self._batch_window_in_secs = batch_window_in_secs
+        self._max_concurrent_batches = max_concurrent_batches
+
+        # the queue and semaphore are created in the running event loop on first use
+        self._queue: Optional["asyncio.Queue[BatchItemType]"] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._worker: Optional["asyncio.Task[None]"] = None
+        # keeps references to in-flight batch requests until they are done
+        self._batch_tasks: Set["asyncio.Task[None]"] = set()
+
+    async def detect_sentiment(self, text: str) -> BatchDetectSentimentItemResultTypeDef:
+        """Detects the sentiment of a text as part of a batch
+
+        Returns the BatchDetectSentiment result item of the text
+        """
+        if not text:
+            # an invalid document would fail the whole batch request
+            raise ValueError("invalid empty text in detect sentiment")
+
+        if self._queue is None or self._semaphore is None:
+            self._queue = asyncio.Queue()
+            self._semaphore = asyncio.Semaphore(self._max_concurrent_batches)
+
+        future: "asyncio.Future[BatchDetectSentimentItemResultTypeDef]" = (
+            asyncio.get_running_loop().create_future()
+        )
+        self._queue.put_nowait((text, future))
+        if self._worker is None or self._worker.done():
+            self._worker = asyncio.create_task(
+                self._process_queue(self._queue, self._semaphore)
+            )
+
+        return await future
+
+    async def _process_queue(
+        self,
+        queue: "asyncio.Queue[BatchItemType]",
+        semaphore: asyncio.Semaphore,
+    ) -> None:
+        """Drains the queue into batch requests
+
+        Exits when the queue is empty. It is restarted by the next request
+        """
+        while not queue.empty():
+            if queue.qsize() < self._max_batch_size:
+                # give concurrent requests a chance to join the batch
+                await asyncio.sleep(self._batch_window_in_secs)
+
+            batch_size = min(queue.qsize(), self._max_batch_size)
+            batch: List[BatchItemType] = [queue.get_nowait() for _ in range(batch_size)]
+
+            batch_task = asyncio.create_task(self._send_batch(batch, semaphore))
+            self._batch_tasks.add(batch_task)
+            batch_task.add_done_callback(self._batch_tasks.discard)
+
+    async def _send_batch(
+        self,
+        batch: List[BatchItemType],
+        semaphore: asyncio.Semaphore,
+    ) -> None:
+        """Sends a BatchDetectSentiment request and resolves the batch futures"""
+        LOGGER.debug("batch detect sentiment - batch size: [%d]", len(batch))
+        try:
+            # bounds the concurrent requests to avoid being throttled by Comprehend
+            async with semaphore:
+                response = await self._comprehend_client.batch_detect_sentiment(
+                    TextList=[text for text, _ in batch],
+                    LanguageCode=self._language_code,
+                )
+        except Exception as error:  # pylint: disable=broad-except
+            LOGGER.exception("batch detect sentiment exception")
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(error)
+            return
+
+        for result in response.get("ResultList", []):
+            _, future = batch[result["Index"]]
+            if not future.done():
+                future.set_result(result)
+
+        for item_error in response.get("ErrorList", []):
+            _, future = batch[item_error["Index"]]
+            if not future.done():
+                future.set_exception(
+                    ValueError(
+                        "batch detect sentiment item error - "
+                        f"code: [{item_error.get('ErrorCode')}] - "
+                        f"message: [{item_error.get('ErrorMessage')}]"
+                    )
+                )
+
+        # guard against items missing from both the result and error lists
+        for _, future in batch:
+            if not future.done():
+                future.set_exception(ValueError("missing batch detect sentiment result"))
@@ -0,0 +1,217 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: Apache-2.0
+"""Sentiment LRU Cache"""
+import asyncio
+from collections import OrderedDict
+import hashlib
+import json
+import os
+import time
+from typing import Any, Awaitable, Callable, Dict, Final, Optional, Tuple
+
+from aws_lambda_powertools import Logger
+
+
+LOGGER = Logger(child=True, location="%(filename)s:%(lineno)d - %(funcName)s()")
+
+# cache entries are keyed by language code and the SHA-256 hash of the text
+CacheKeyType = Tuple[str, str]
+
+
+class _CacheEntry:
+    """Cached sentiment result"""
+
+    # pylint: disable=too-few-public-methods
+    __slots__ = ("expires_at", "result", "hits")
+
+    def __init__(self, expires_at: float, result: Any, hits: int = 0) -> None:
+        self.expires_at = expires_at
+        self.result = result
+        self.hits = hits
+
+
+class SentimentCache:
+    """Sentiment LRU Cache
+
+    Memoizes sentiment results by language code and text so that repeated texts
+    don't call Comprehend. Concurrent lookups of a text that is not cached yet
+    share a single in-flight request (single-flight). Entries are evicted in
+    least recently used order when the cache is full and expire after a time to
+    live. Failed requests are not cached.
+
+    Texts can optionally be normalized (lower cased, punctuation stripped and
+    whitespace collapsed) before being used as the cache key so that texts that
+    only differ in case or punctuation (e.g. "hello there" and "Hello, there.")
+    share the same result.
+
+    The cache can optionally be persisted to a file (e.g. in the Lambda /tmp
+    directory) so that it survives restarts of the process in the same
+    execution environment. Only entries that have been hit at least once are
+    persisted so that one-off texts don't fill the file. Entries are keyed by
+    a hash of the text so that transcript texts are never written to the file.
+    """
+
+    DEFAULT_MAX_SIZE: Final[int] = 4096
+    DEFAULT_TTL_IN_SECS: Final[int] = 3600
+    DEFAULT_PERSIST_INTERVAL_IN_SECS: Final[float] = 60
+    DEFAULT_MAX_PERSISTED_SIZE: Final[int] = 1024
+
+    def __init__(
+        self,
+        max_size: int = DEFAULT_MAX_SIZE,
+        ttl_in_secs: int = DEFAULT_TTL_IN_SECS,
+        persist_path: Optional[str] = None,
+        persist_interval_in_secs: float = DEFAULT_PERSIST_INTERVAL_IN_SECS,
+        max_persisted_size: int = DEFAULT_MAX_PERSISTED_SIZE,
+        normalize_text: bool = False,
+    ) -> None:
+        """Initializes the Sentiment Cache
+
+        :param max_size: maximum number of cached sentiment results
+        :param ttl_in_secs: time in seconds after which a cached result expires
+        :param persist_path: path of the file where the cache is persisted. The
+        cache is loaded from it if it exists. Persistence is disabled if None
+        :param persist_interval_in_secs: minimum time in seconds between writes
+        of the persisted cache
+        :param max_persisted_size: maximum number of persisted sentiment results
+        :param normalize_text: use the normalized text as the cache key
+        """
+        # pylint: disable=too-many-arguments
+        self._max_size = max_size
+        self._ttl_in_secs = ttl_in_secs
+        self._persist_path = persist_path
+        self._persist_interval_in_secs = persist_interval_in_secs
+        self._max_persisted_size = max_persisted_size
+        self._normalize_text = normalize_text
+
+        self._entries: "OrderedDict[CacheKeyType, _CacheEntry]" = OrderedDict()
+        self._in_flight: Dict[CacheKeyType, "asyncio.Future[Any]"] = {}
+        self._persisted_at = time.time()
+        self._is_dirty = False
+
+        if self._persist_path:
+            self._load()
+
+    async def get_or_set(
+        self,
+        language_code: str,
+        text: str,
+        detect_sentiment_fn: Callable[[str], Awaitable[Any]],
+    ) -> Any:
+        """Gets the cached sentiment of a text
+
+        Calls detect_sentiment_fn with the text on a cache miss and caches its
+        result
+        """
+        key: CacheKeyType = (language_code, self._get_text_hash(text))
+        entry = self._entries.get(key)
+        if entry is not None:
+            if entry.expires_at > time.time():
+                LOGGER.debug("using sentiment cache on text: [%s]", text)
+                entry.hits = entry.hits + 1
+                self._is_dirty = True
+                self._entries.move_to_end(key)
+                return entry.result
+            del self._entries[key]
+
+        in_flight = self._in_flight.get(key)
+        if in_flight is None:
+            in_flight = asyncio.ensure_future(detect_sentiment_fn(text))
+            self._in_flight[key] = in_flight
+            in_flight.add_done_callback(lambda future: self._set_result(key, future))
+
+        # shielded so that a cancelled caller doesn't cancel the shared request
+        return await asyncio.shield(in_flight)
+
+    def _get_text_hash(self, text: str) -> str:
+        if self._normalize_text:
+            # lower case, drop punctuation and collapse whitespace
+            text = " ".join(
+                "".join(c for c in word if c.isalnum()) for word in text.lower().split()
+            ).strip()
+        return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+    def _set_result(self, key: CacheKeyType, future: "asyncio.Future[Any]") -> None:
+        self._in_flight.pop(key, None)
+        if future.cancelled() or future.exception() is not None:
+            return
+
+        self._add_entry(key, _CacheEntry(time.time() + self._ttl_in_secs, future.result()))
+
+    def _add_entry(self, key: CacheKeyType, entry: _CacheEntry) -> None:
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self._max_size:
+            self._entries.popitem(last=False)
+
+    def persist_if_due(self) -> None:
+        """Persists the cache if it changed and the persist interval elapsed"""
+        if not self._persist_path or not self._is_dirty:
+            return
+        if time.time() - self._persisted_at < self._persist_interval_in_secs:
+            return
+        self.persist()
+
+    def persist(self) -> None:
+        """Writes the entries that have been hit to the persist file
+
+        The most recently used entries are kept when there are more than the
+        maximum persisted size
+        """
+        if not self._persist_path:
+            return
+
+        now = time.time()
+        items = [
+            [language_code, text_hash, entry.expires_at, entry.hits, entry.result]
+            for (language_code, text_hash), entry in reversed(self._entries.items())
+            if entry.hits > 0 and entry.expires_at > now
+        ][: self._max_persisted_size]
+        # oldest first so that loading restores the least recently used order
+        items.reverse()
+
+        # written to a temporary file and renamed so that a partial write
+        # is never loaded
+        temp_path = f"{self._persist_path}.tmp"
+        try:
+            with open(temp_path, "w", encoding="utf-8") as persist_file:
+                json.dump(items, persist_file)
+            os.replace(temp_path, self._persist_path)
+        except (OSError, TypeError, ValueError) as error:
+            LOGGER.warning("unable to persist sentiment cache - error: [%s]", error)
+            return
+        finally:
+            self._persisted_at = now
+
+        self._is_dirty = False
+        LOGGER.debug("persisted sentiment cache - size: [%d]", len(items))
+
+    def _load(self) -> None:
+        if not self._persist_path:
+            return
+
+        try:
+            with open(self._persist_path, "r", encoding="utf-8") as persist_file:
+                items = json.load(persist_file)
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError) as error:
+            LOGGER.warning("unable to load persisted sentiment cache - error: [%s]", error)
+            return
+
+        now = time.time()
+        try:
+            for language_code, text_hash, expires_at, hits, result in items:
+                if expires_at > now:
+                    self._add_entry(
+                        (language_code, text_hash), _CacheEntry(expires_at, result, hits)
+                    )
+        except (TypeError, ValueError) as error:
+            LOGGER.warning("invalid persisted sentiment cache - error: [%s]", error)
+            self._entries.clear()
+            return
+
+        LOGGER.debug("loaded persisted sentiment cache - size: [%d]", len(self._entries))
+
+    def __len__(self) -> int:
+        return len(self._entries)